@@ -2,24 +2,41 @@
 import time
 from machine import ADC, Pin
 
+# read_u16() spans 0-65535 across 0.0v - 3.3v, the battery is halved by a divider
+_ADC_SCALE = 3.3 * 2 / 65536
+
 class Battery:
     def __init__(self, pin, discharge=3.0, overcharge=4.2):
         self.bat = ADC(Pin(pin))   # create ADC object on ADC pin
         self.dischar = discharge
         self.overchar = overcharge
+        self._inv_range = 100.0 / (overcharge - discharge)
+        # Thresholds in raw ADC counts, for integer-only percentage polling
+        self._dischar_u16 = int(discharge / _ADC_SCALE)
+        self._overchar_u16 = int(overcharge / _ADC_SCALE)
         self.volt = 0
         
     def voltage(self):
-        # read value, 0-65535 across voltage range 0.0v - 3.3v
-        self.volt =  self.bat.read_u16()
-        self.volt = 3.3/65536*self.volt*2
-        return self.volt
+        v = self.bat.read_u16() * _ADC_SCALE
+        self.volt = v
+        return v
     
     def percentageVoltage(self):
-        self.voltage()
-        if self.volt < self.dischar:
+        v = self.voltage()
+        if v < self.dischar:
+            return 0
+        return int((v - self.dischar) * self._inv_range)
+
+    def readU16(self):
+        # Raw ADC count, 0-65535
+        return self.bat.read_u16()
+
+    # Same as percentageVoltage(), but without any floating point math.
+    def percentageFast(self):
+        r = self.bat.read_u16()
+        if r < self._dischar_u16:
             return 0
-        return int((self.volt - self.dischar)/(self.overchar - self.dischar)*100)
+        return (r - self._dischar_u16) * 100 // (self._overchar_u16 - self._dischar_u16)
 
 if __name__ == '__main__':
     bat = Battery(28)
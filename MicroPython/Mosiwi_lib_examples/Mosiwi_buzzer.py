@@ -13,6 +13,9 @@ from machine import Pin, PWM
 # pwm8.deinit()                   # turn off PWM on the pin
 
 class Buzzer:
+    # Duty cycle for each volume 0--100
+    _duty_table = tuple(65535 - v*328 for v in range(101))
+
     def __init__(self, pin, freq=1000, volume = 0):
         assert 50 <= freq < 1000000, "ERROR - The freq parameter must be in the range 0--1000000"
         assert volume <= 100, "ERROR - The volume parameter must be in the range 0--100"
@@ -28,6 +31,10 @@ class Buzzer:
         assert volume <= 100, "ERROR - The vol parameter must be in the range 0--100"
         self.buzzer.duty_u16(65535 - volume*328)
 
+    # Unchecked setVolume() for tight loops, volume must be an int in the range 0--100.
+    def setVolumeFast(self, volume):
+        self.buzzer.duty_u16(self._duty_table[volume])
+
 
 if __name__ == '__main__':
     buzzer = Buzzer(11)
@@ -35,11 +42,11 @@ if __name__ == '__main__':
     while True:
         for i in range(0, 101):
             time.sleep_ms(50)         # sleep for 50 milliseconds
-            buzzer.setVolume(i)
+            buzzer.setVolumeFast(i)
 
         for i in range(0, 101):
             time.sleep_ms(50)        
-            buzzer.setVolume(100-i)  
+            buzzer.setVolumeFast(100-i)  
 
         time.sleep_ms(3000)
 
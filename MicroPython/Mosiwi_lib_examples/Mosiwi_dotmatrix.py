@@ -6,8 +6,24 @@ https://docs.micropython.org/en/latest/rp2/quickref.html
 Module containing code to run a stepper motor via the ULN2003 driver board.
 """
 import utime as time
+import micropython
 from machine import I2C, Pin
 
+@micropython.viper
+def _shift_in(buf: ptr8, width: int, col: int):
+    """
+    Shift the first width columns of buf one place left and append col
+    """
+    for i in range(width - 1): buf[i] = buf[i + 1]
+    buf[width - 1] = col
+
+@micropython.viper
+def _invert(buf: ptr8, n: int):
+    """
+    Invert the first n bytes of buf in place
+    """
+    for i in range(n): buf[i] = buf[i] ^ 0xFF
+
 class HT16K33:
     """
     A simple, generic driver for the I2C-connected Holtek HT16K33 controller chip. This release supports MicroPython 
@@ -32,12 +48,14 @@ class HT16K33:
     address = 0
     brightness = 15
     flash_rate = 0
+    _zero = None
 
     # *********** CONSTRUCTOR **********
     def __init__(self, i2c, i2c_address):
         assert 0x00 <= i2c_address < 0x80, "ERROR - Invalid I2C address in HT16K33()"
         self.i2c = i2c
         self.address = i2c_address
+        self._cmd_buf = bytearray(1)
         self.power_on()
 
     # *********** PUBLIC METHODS **********
@@ -84,7 +102,9 @@ class HT16K33:
 
         Returns: The instance (self)
         """
-        for i in range(0, len(self.buffer)): self.buffer[i] = 0x00
+        # Zero source built once per instance, sized from whatever buffer the subclass uses
+        if self._zero is None: self._zero = bytes(len(self.buffer))
+        self.buffer[:] = self._zero
         return self
 
     def power_on(self):
@@ -96,7 +116,7 @@ class HT16K33:
 
     def power_off(self):
         """
-        Power on the controller and display.
+        Power off the controller and display.
         """
         self._write_cmd(self.HT16K33_GENERIC_DISPLAY_OFF)
         self._write_cmd(self.HT16K33_GENERIC_SYSTEM_OFF)
@@ -115,7 +135,8 @@ class HT16K33:
         """
         Writes a single command to the HT16K33. A private method.
         """
-        self.i2c.writeto(self.address, bytes([byte]))
+        self._cmd_buf[0] = byte
+        self.i2c.writeto(self.address, self._cmd_buf)
 
         
 class HT16K33Matrix(HT16K33):
@@ -236,10 +257,13 @@ class HT16K33Matrix(HT16K33):
     rotation_angle = 0
     is_rotated = False
     is_inverse = False
+    _flat_inv = None
 
     # *********** CONSTRUCTOR **********
     def __init__(self, i2c, i2c_address=0x70):
         self.buffer = bytearray(self.width)
+        # I2C frame: display address byte followed by the buffer, reused by draw()
+        self._frame = bytearray(self.width + 1)
         self.def_chars = []
         for i in range(32): self.def_chars.append(b"\x00")
         super(HT16K33Matrix, self).__init__(i2c, i2c_address)
@@ -250,8 +274,7 @@ class HT16K33Matrix(HT16K33):
         Returns: The instance (self)
         """
         self.is_inverse = not self.is_inverse
-        for i in range(self.width):
-            self.buffer[i] = (~ self.buffer[i]) & 0xFF
+        _invert(self.buffer, self.width)
         return self
 
     def set_icon(self, glyph):
@@ -294,51 +317,35 @@ class HT16K33Matrix(HT16K33):
             glyph = self.CHARSET[ascii_value]
         return self.set_icon(glyph)
 
-    def scroll_text(self, the_line, speed=0.1):
+    def scroll_text(self, the_line, speed_ms=100):
         """
         Scroll the specified line of text leftwards across the display.
         Args:
             the_line (string) The string to display
-            speed (float)     The delay between frames
+            speed_ms (int)    The delay between frames in milliseconds. Default: 100
+                              Values below 1 are taken as seconds, as in earlier releases
         Returns: The instance (self)
         """
 
         # Bail on incorrect values
         assert len(the_line) > 0, "ERROR - Invalid string set in scroll_text()"
-
-        # Calculate the source buffer size
-        length = 0
-        for i in range(0, len(the_line)):
-            asc_val = ord(the_line[i])
-            if asc_val < 32: glyph = self.def_chars[asc_val]
-            else: glyph = self.CHARSET[asc_val - 32]
-            length += len(glyph)
-            if asc_val > 32: length += 1
-        src_buffer = bytearray(length)
-
-        # Draw the string to the source buffer
-        row = 0
-        for i in range(0, len(the_line)):
-            asc_val = ord(the_line[i])
-            if asc_val < 32: glyph = self.def_chars[asc_val]
-            else: glyph = self.CHARSET[asc_val - 32]
-            for j in range(0, len(glyph)):
-                src_buffer[row] = glyph[j] if self.is_inverse is False else ((~ glyph[j]) & 0xFF)
-                row += 1
-            if asc_val > 32: row += 1
-        assert row == length, "ERROR - Mismatched lengths in scroll_text()"
-
-        # Finally, animate the line
-        cursor = 0
-        while True:
-            a = cursor
-            for i in range(0, self.width):
-                self.buffer[i] = src_buffer[a];
-                a += 1
+        if speed_ms < 1: speed_ms = int(speed_ms * 1000)
+
+        # Fill the display with the first columns, then shift in one column per frame
+        cols = self._glyph_cols(the_line)
+        buf = self.buffer
+        width = self.width
+        i = 0
+        for col in cols:
+            buf[i] = col
+            i += 1
+            if i == width: break
+        for j in range(i, width): buf[j] = 0
+        self.draw()
+        for col in cols:
+            time.sleep_ms(speed_ms)
+            _shift_in(buf, width, col)
             self.draw()
-            cursor += 1
-            if cursor > length - self.width: break
-            time.sleep(speed)
 
     def define_character(self, glyph, char_code=0):
         """
@@ -356,6 +363,7 @@ class HT16K33Matrix(HT16K33):
         self.def_chars[char_code] = glyph
         return self
 
+    @micropython.native
     def plot(self, x, y, ink=1, xor=False):
         """
         Plot a point on the matrix. (0,0) is bottom left as viewed.
@@ -369,17 +377,15 @@ class HT16K33Matrix(HT16K33):
         # Bail on incorrect values
         assert (0 <= x < self.width) and (0 <= y < self.height), "ERROR - Invalid coordinate set in plot()"
 
-        if ink not in (0, 1): ink = 1
-        if ink == 1:
-            if self.is_set(x ,y) and xor:
-                self.buffer[x] ^= (1 << y)
-            else:
-                if self.buffer[x] & (1 << y) == 0: self.buffer[x] |= (1 << y)
+        ink = 1 if ink else 0
+        mask = 1 << y
+        cur = self.buffer[x]
+        if xor and ((cur >> y) & 1) == ink:
+            self.buffer[x] = cur ^ mask
+        elif ink:
+            self.buffer[x] = cur | mask
         else:
-            if not self.is_set(x ,y) and xor:
-                self.buffer[x] ^= (1 << y)
-            else:
-                if self.buffer[x] & (1 << y) != 0: self.buffer[x] &= ~(1 << y)
+            self.buffer[x] = cur & ~mask
         return self
 
     def is_set(self, x, y):
@@ -401,21 +407,53 @@ class HT16K33Matrix(HT16K33):
         Takes the contents of _buffer and writes it to the LED matrix.
         NOTE Overrides the parent method.
         """
-        new_buffer = bytearray(len(self.buffer))
-        for i in range(self.width): new_buffer[i] = self.buffer[i]
-        draw_buffer = bytearray(17)
-        for i in range(len(new_buffer)): draw_buffer[i + 1] = new_buffer[i]
-        self.i2c.writeto(self.address, bytes(draw_buffer))
+        self._frame[1:] = self.buffer
+        self.i2c.writeto(self.address, self._frame)
 
-    def _fill(value=0xFF):
+    def _glyph_cols(self, the_line):
+        """
+        Yield the column bytes of a string one at a time, with inversion applied
+        """
+        inv = self.is_inverse
+        flat = self._inverse_flat() if inv else _FLAT
+        dc = self.def_chars
+        for c in the_line:
+            asc_val = ord(c)
+            if asc_val < 32:
+                for b in dc[asc_val]: yield (~ b) & 0xFF if inv else b
+            else:
+                n = asc_val - 32
+                base = n * _GLYPH_W
+                for j in range(base, base + _LEN[n]): yield flat[j]
+            if asc_val > 32: yield 0
+
+    def _inverse_flat(self):
+        """
+        Return an inverted copy of the flat glyph table, built once on first use
+        """
+        if self._flat_inv is None:
+            self._flat_inv = bytes([(~ b) & 0xFF for b in _FLAT])
+        return self._flat_inv
+
+    def _fill(self, value=0xFF):
         """
         Fill the buffer, column by column with the specified byte value
         """
-        value &= 0xFF
-        for i in range(self.width): self.buffer[i] = value
-        
-        
-        
+        self.buffer[:] = bytes([value & 0xFF]) * self.width
+
+
+
+# *********** GLYPH TABLE **********
+# CHARSET padded to a fixed width in one flat table: column j of character n is
+# _FLAT[n * _GLYPH_W + j], and the glyph's real width is _LEN[n]
+_GLYPH_W = 5
+_FLAT = bytearray(len(HT16K33Matrix.CHARSET) * _GLYPH_W)
+_LEN = bytearray(len(HT16K33Matrix.CHARSET))
+for _n, _glyph in enumerate(HT16K33Matrix.CHARSET):
+    _LEN[_n] = len(_glyph)
+    _FLAT[_n * _GLYPH_W:_n * _GLYPH_W + len(_glyph)] = _glyph
+
+
 # CONSTANTS
 PAUSE = 3
 
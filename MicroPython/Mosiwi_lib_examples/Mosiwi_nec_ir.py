@@ -7,8 +7,17 @@ Wiki: https://mosiwi-wiki.readthedocs.io/en/latest/common_resource/nec_communica
 import time
 import rp2
 import array
+import micropython
+import uasyncio as asyncio
+from micropython import const
 from machine import Pin
-from machine import Timer
+from machine import disable_irq, enable_irq
+
+# NEC pulse widths in microseconds
+_DATA_PW = const(560)       # data pulse, a one's space is 3 times longer
+_START_HI = const(9000)     # leading pulse
+_START_LO = const(4500)     # space after the leading pulse of a command
+_REPEAT_LO = const(2250)    # space after the leading pulse of a repeat code
 
 @rp2.asm_pio()
 def pulses():
@@ -45,10 +54,9 @@ def pulses():
     label("write")
     in_(x, 32)               #Shift all the bits in the X register to the Input Shift Register (ISR)
     push()                   #Push the contenst of the ISR to the RX FIFO so the main program can receive it. PUSH clears the ISR
-    #irq(0)
     in_(y, 32)               #Shift all the bits in the Y register to the Input Shift Register (ISR)
     push()                   #Push the contenst of the ISR to the RX FIFO so the main program can receive it. PUSH clears the ISR
-    #irq(0)
+    irq(rel(0))              #Raise this state machine's IRQ so PulseReader drains the pair from the RX FIFO
                              #This duration of the HIGH and LOW puslses are now in the RX FIFO. The program can determine if those pulses
                              #represent a start of code, a zero, a one, or a timeout indicating the IR receiver is not receiving any more
                              #pulses from the remote control.
@@ -57,117 +65,202 @@ def pulses():
     label("timeout")
     mov(isr, invert(null))   #This sets the value of ISR to 0xffffffff
     push()                   #Push the ISR to the RX FIFO so the user knows that the code is done
-    #irq(0)
+    irq(rel(0))              #Raise this state machine's IRQ so PulseReader picks up the end of the frame
     jmp("setup")             #Jump back to setup subroutine to reset the X and Y registers
     
     wrap()
 
 
+# A command frame is 2 start pulses + 32 bits * 2 pulses, longer frames are dropped.
+_FRAME_PULSES = const(66)
+_MAX_PULSES = const(68)
+
+
+def _gcd(a, b):
+    while b: a, b = b, a % b
+    return a
+
+@micropython.viper
+def _scaleShift(dst: ptr16, src: ptr16, n: int, mul: int, shift: int):
+    # dst[i] = src[i] * mul >> shift for the first n pulses
+    for i in range(n): dst[i] = (src[i] * mul) >> shift
+
+
 class PulseReader:
-    rawPulsesBuf = []
-    rawRepeatTimeBuf = []
-    rawCommandTimeBuf = []
     pulseTimeout = 2**12-1    #4095
     newRepeatFlag = False
     newCommandFlag = False
     
-    def __init__(self, p, f):
+    def __init__(self, p, f, callback=None):
         self.smFreq = f
+        # Each count is 2 state machine cycles: us = count * 2000000 / f, reduced to count * mul / div
+        g = _gcd(2_000_000, f)
+        self._mul = 2_000_000 // g
+        self._div = f // g
+        # Shift instead of dividing when div is a power of two (div = 16 at 256kHz)
+        self._shift = -1
+        d, sh = self._div, 0
+        while d > 1 and not d & 1:
+            d >>= 1
+            sh += 1
+        if d == 1: self._shift = sh
+        self.callback = callback    # scheduled with no argument once a frame is complete
+        # Preallocated pulse buffers, so the timer callback never allocates
+        self.rawPulsesBuf = array.array('H', bytearray(2 * _MAX_PULSES))
+        self.rawPulsesLen = 0
+        self.rawRepeatTimeBuf = array.array('H', bytearray(2 * 2))
+        # Double-buffered command frames: convertToMS() fills one buffer while
+        # rawCommandTimeBuf publishes the other, last complete frame.
+        self._cmdBufs = (array.array('H', bytearray(2 * _MAX_PULSES)), array.array('H', bytearray(2 * _MAX_PULSES)))
+        self._cmdActive = 0
+        self.rawCommandTimeBuf = self._cmdBufs[1]
+        self.rawCommandLen = 0
         Pin(p, Pin.IN, Pin.PULL_UP)
         # Instantiate a state machine with the pluses program, at fHz, with set bound to pin
         self.sm = rp2.StateMachine(0, pulses, freq=f, jmp_pin=Pin(p))
+        # The program raises an IRQ after each push, so the FIFO is drained only when there is data
+        self.sm.irq(self.getPulses)
         self.sm.active(1)
-        Timer(freq=4000, mode=Timer.PERIODIC, callback=self.getPulses)
         
-    def convertToMS(self, code):    # Convert to microseconds
-        self.rawRepeatTimeBuf = []
-        factor = 2 * 1000000 / self.smFreq
-        if len(code) == 2:
-            for i in code: self.rawRepeatTimeBuf.append(int(i * factor))
+    def convertToMS(self, code, n):    # Convert to microseconds
+        dst = self.rawRepeatTimeBuf if n == 2 else self._cmdBufs[self._cmdActive]
+        if self._shift >= 0: _scaleShift(dst, code, n, self._mul, self._shift)
+        else:
+            mul, div = self._mul, self._div
+            for i in range(n): dst[i] = code[i] * mul // div
+        if n == 2:
             self.newRepeatFlag = True
         else:
-            self.rawCommandTimeBuffer = []
-            for i in code: self.rawCommandTimeBuf.append(int(i * factor))
+            # Publish the filled buffer and switch to the other one for the next frame.
+            state = disable_irq()
+            self.rawCommandTimeBuf = dst
+            self.rawCommandLen = n
+            self._cmdActive ^= 1
             self.newCommandFlag = True
+            enable_irq(state)
+        if self.callback:
+            try: micropython.schedule(self.callback, None)
+            except RuntimeError: pass   # schedule queue full, the frame is still polled by decode()
+
+    def takeCommand(self):
+        # Return the last complete command frame and its length, and clear newCommandFlag.
+        state = disable_irq()
+        buf, n = self.rawCommandTimeBuf, self.rawCommandLen
+        self.newCommandFlag = False
+        enable_irq(state)
+        return buf, n
 
     def getPulses(self, t):
-        if self.sm.rx_fifo():
-            pulse = self.sm.get()
+        # Drain every word in the RX FIFO, working on locals and writing the length back once
+        sm = self.sm
+        rx_fifo = sm.rx_fifo
+        get = sm.get
+        buf = self.rawPulsesBuf
+        timeout = self.pulseTimeout
+        n = self.rawPulsesLen
+        while rx_fifo():
+            pulse = get()
             #print("0x"+f'{pulse:>00x}')
             if pulse == 0xffffffff:
-                self.convertToMS(self.rawPulsesBuf)
-                self.rawPulsesBuf = []
-            else: self.rawPulsesBuf.append(self.pulseTimeout - pulse)
+                if n <= _MAX_PULSES:
+                    self.convertToMS(buf, n)
+                n = 0
+            elif n < _MAX_PULSES:
+                buf[n] = timeout - pulse
+                n += 1
+            else: n = _MAX_PULSES + 1  # overflow, drop the whole frame
+        self.rawPulsesLen = n
+
+
+@micropython.viper
+def _decodeBits(buf: ptr16, n: int) -> uint:
+    # Decode the 32 data bits that follow the 2 start pulses, MSB first.
+    # Each pulse must be within 20% of its nominal width: abs(v-e) < v*0.2, as (v-e)*5 < v.
+    # Returns 0 on an invalid pulse, a valid NEC frame always has bits set.
+    data = 0
+    i = 2
+    while i < n - 1:
+        p = buf[i]
+        q = buf[i + 1]
+        if (p - _DATA_PW) * 5 >= p or (_DATA_PW - p) * 5 >= p: return uint(0)
+        if p + q > _DATA_PW * 3:
+            if (q - _DATA_PW * 3) * 5 >= q or (_DATA_PW * 3 - q) * 5 >= q: return uint(0)
+            bit = 32 - (i >> 1)
+            if bit >= 0: data |= 1 << bit
+        else:
+            if (q - _DATA_PW) * 5 >= q or (_DATA_PW - q) * 5 >= q: return uint(0)
+        i += 2
+    return uint(data)
+
+
+# True if val is within 20% of expectedVal, in integers: abs(val-expectedVal) < val*0.2
+def _match(val, expectedVal):
+    return abs(val - expectedVal) * 5 < val
 
 
 # https://mosiwi-wiki.readthedocs.io/en/latest/common_resource/nec_communication_protocol/nec_communication_protocol.html
 class necDecoder:
-    def __init__(self, irPin, commandRepeat: int=False):
+    def __init__(self, irPin, commandRepeat: int=False, autoDecode: bool=False):
+        # autoDecode: decode each frame from the scheduler as it arrives and signal it
+        # through ready/dataReady. Leave it False to poll decode() instead.
         self.necData = 0
+        self.ready = False          # Set when a new key has been decoded, clear it after reading necData
+        self.dataReady = asyncio.ThreadSafeFlag()   # Set with ready, for tasks that await new keys
         self.commandRepeat = commandRepeat
-        self.__DATA_PULSE_WIDTH = 560
-        self.pulseReader = PulseReader(irPin, 256000)
-
-    def match(self, val, expectedVal, ALLOWED_DEVIATION=0.20):
-        return abs(val-expectedVal) < val * ALLOWED_DEVIATION
+        self.pulseReader = PulseReader(irPin, 256000, self._onFrame if autoDecode else None)
 
-    def checkZero(self, p1, p2):
-        return self.match(p1, self.__DATA_PULSE_WIDTH) and self.match(p2, self.__DATA_PULSE_WIDTH)
+    def _onFrame(self, _):
+        # Runs from the scheduler when PulseReader has captured a frame
+        if self.decode():
+            self.ready = True
+            self.dataReady.set()
 
-    def checkOne(self, p1, p2):
-        return self.match(p1, self.__DATA_PULSE_WIDTH) and self.match(p2, self.__DATA_PULSE_WIDTH * 3)
-    
-    def decodeCommand(self, rawPulses):
-        if len(rawPulses) > 1:
+    def decodeCommand(self, rawPulses, n):
+        # rawPulses: array('H') of pulse widths in microseconds, n: number of pulses in it
+        if n >= _FRAME_PULSES:
             self.necData = 0
-            self.pulseReader.newCommandFlag = False
-            if not self.match(rawPulses[0], 9000) and not self.match(rawPulses[1], 4500):
+            if not _match(rawPulses[0], _START_HI) or not _match(rawPulses[1], _START_LO):
                 #print("invalid code - Starting pulse error")
                 return False
-            
-            for i in range(2, len(rawPulses)-1, 2):
-                if (rawPulses[i] + rawPulses[i+1]) > self.__DATA_PULSE_WIDTH * 3:
-                    if self.checkOne(rawPulses[i], rawPulses[i+1]):
-                        self.necData |= 1 << (31 - (int(i/2) - 1))
-                    else:
-                        #print(f"Invalid Code - One: {rawPulses[i]} {rawPulses[i+1]}")
-                        return False
-                else:
-                    if not self.checkZero(rawPulses[i], rawPulses[i+1]):
-                        #print(f"Invalid Code - Zero: {rawPulses[i]} {rawPulses[i+1]}")
-                        return False
+
+            data = _decodeBits(rawPulses, n)
+            if data == 0:
+                #print("Invalid Code - Data pulse error")
+                return False
+            self.necData = data
             return True
         return False
         
     def decode(self):
-        if self.pulseReader.newCommandFlag:
-            rawPulses = self.pulseReader.rawCommandTimeBuf.copy()
-            self.pulseReader.rawCommandTimeBuf = []
-            if self.decodeCommand(rawPulses):
-                self.err = 0
+        pr = self.pulseReader
+        if pr.newCommandFlag:
+            buf, n = pr.takeCommand()
+            if self.decodeCommand(buf, n):
                 return True        
-        if self.pulseReader.newRepeatFlag:
-            rawRepeat = self.pulseReader.rawRepeatTimeBuf.copy()
-            self.pulseReader.rawRepeatTimeBuf = [] 
-            if len(rawRepeat):
-                self.pulseReader.newCommandFlag = False
-                if self.match(rawRepeat[0], 9000) and self.match(rawRepeat[1], 2250):
-                    if not self.commandRepeat: self.necData = 0xffffffff # Repeat data
-                    return True
+        if pr.newRepeatFlag:
+            pr.newRepeatFlag = False
+            pr.newCommandFlag = False
+            rawRepeat = pr.rawRepeatTimeBuf
+            if _match(rawRepeat[0], _START_HI) and _match(rawRepeat[1], _REPEAT_LO):
+                if not self.commandRepeat: self.necData = 0xffffffff # Repeat data
+                return True
         return False
 
 
 
 if __name__ == '__main__':
     # Returns 0xffffffff when you hold the key down.
-    ir = necDecoder(2)
+    ir = necDecoder(2, autoDecode=True)
     # Returns the key value when holding down the key. 
-    #ir = necDecoder(2, True)
+    #ir = necDecoder(2, True, autoDecode=True)
     
-    while True:
-        if ir.decode():
+    async def demo():
+        while True:
+            await ir.dataReady.wait()
+            ir.ready = False
             print(f"0x{ir.necData:>00x}")
-        time.sleep(0.1)
+
+    asyncio.run(demo())
 
 
 
@@ -1,36 +1,49 @@
 # https://docs.micropython.org/en/latest/rp2/quickref.html
 import time
+import micropython
 from machine import Pin, I2C
 
+# Big-endian 16-bit value at buf[off], buf[off+1].
+@micropython.viper
+def _be16(buf: ptr8, off: int) -> int:
+    return (int(buf[off]) << 8) | int(buf[off + 1])
+
 class Ph_iic:
     address = 0x2c
-    data = [0,0,0,0,0,0,0,0,0,0,0]
     
     def __init__(self, scl=5, sda=4):
         self.i2c = I2C(0, scl=Pin(5), sda=Pin(4), freq=100_000)
+        self._buf = bytearray(11)
+        self.data = memoryview(self._buf)   # view of the last read, no copy
+        self._ts = None                     # ticks_ms of the last read
     
+    # Read all 11 bytes of the module in one I2C transaction.
+    def refresh(self):
+        self.i2c.readfrom_into(self.address, self._buf)
+        self._ts = time.ticks_ms()
+
     def read(self):
-        buf = bytearray(11)
-        self.i2c.readfrom_into(self.address, buf)
-        for i in range(11):
-            self.data[i] = buf[i]
+        self.refresh()
+
+    # Refresh only if the last read is older than max_age_ms.
+    def sample(self, max_age_ms=20):
+        if self._ts is None or time.ticks_diff(time.ticks_ms(), self._ts) > max_age_ms:
+            self.refresh()
     
-    # Read the directional value of the light.
+    # Read the directional value of the light from the last refresh().
     # resolution ratio: 22.5degree
     # return: 22.5*i, i=0--15
     def readDegree(self):
-        self.read();
-        return self.data[9]*256+self.data[10]
+        return _be16(self._buf, 9)
     
-    # index: 0--8, Map to 9 light-sensitive sensors on the module.
+    # index: 0--8, Map to 9 light-sensitive sensors on the module, from the last refresh().
     def readPh(self, index):
-        self.read();
-        return self.data[index]
+        return self._buf[index]
 
 if __name__ == '__main__':
     ph = Ph_iic()
 
     while True:
-        ph.read()
-        print(ph.data)
+        ph.refresh()
+        print(list(ph.data), ph.readDegree())
         time.sleep_ms(200)
@@ -1,6 +1,10 @@
 # https://docs.micropython.org/en/latest/rp2/quickref.html
 import time
-from machine import Pin, PWM
+import array
+import micropython
+import rp2
+from machine import Pin, PWM, mem32
+from machine import disable_irq, enable_irq
 
 """
 # create PWM object from a pin and set the frequency of slice 0
@@ -28,21 +32,103 @@ servo:
 36.43 = 11.111/0.305
 """
 
+# duty_u16 for every whole degree 0-180, 1639 + degree*36.43 in integer math
+_DUTY_LUT = array.array('H', (1639 + (d*3643)//100 for d in range(181)))
+
 class Servo:
     def __init__(self, pin):
         self.servo = PWM(Pin(pin))
         self.servo.freq(50)
+        self._set = self.servo.duty_u16
         self.degree = 0
 
+    @micropython.native
     def setDegree(self, degree):
+        assert 0 <= degree <= 180, "ERROR - The degree parameter must be in the range 0--180"
         self.degree = degree
-        self.servo.duty_u16(int(1639 + degree*36.43))
+        self._set(_DUTY_LUT[degree])
         
     def readDegree(self):
         return self.degree
 
 
+# Servo pulse width in microseconds for every whole degree 0-180, 500us + degree*11.111us
+_PULSE_LUT = array.array('H', (500 + (d*100)//9 for d in range(181)))
+_FRAME_US = 20000       # 50Hz frame
+
+# 50Hz servo output on the side-set pin, one count per microsecond at 2MHz.
+# ISR holds the frame length, X the latest pulse width. Y counts the frame down
+# and the pin goes high once Y reaches X, until the end of the frame.
+@rp2.asm_pio(sideset_init=rp2.PIO.OUT_LOW)
+def servo_pulses():
+    pull(noblock)        .side(0)   #Take a new pulse width from the TX FIFO, or keep X when it is empty
+    mov(x, osr)
+    mov(y, isr)                     #Reload the frame length
+    label("loop")
+    jmp(x_not_y, "skip")
+    nop()                .side(1)   #Y reached the pulse width, drive the pin high for the rest of the frame
+    label("skip")
+    jmp(y_dec, "loop")
+
+
+_PIO1_CTRL = 0x50300000    # PIO1 CTRL: SM_ENABLE bits 0-3, CLKDIV_RESTART bits 8-11
+
+# Several servos driven by PIO state machines instead of PWM slices, one per pin.
+# All state machines are started by a single PIO1 CTRL write with their clock
+# dividers restarted, so their 20ms frames stay phase locked. setDegrees() queues
+# every pulse width with interrupts disabled, so all servos take their new position
+# from the same frame.
+# sm_id: first state machine, 4-7 = PIO1 as the NEC IR receiver already uses state machine 0.
+class MultiServo:
+    def __init__(self, pins, sm_id=4):
+        assert 4 <= sm_id and sm_id + len(pins) <= 8, "ERROR - MultiServo needs PIO1 state machines 4--7"
+        self.sms = []
+        mask = 0
+        for i in range(len(pins)):
+            sm = rp2.StateMachine(sm_id + i, servo_pulses, freq=2_000_000, sideset_base=Pin(pins[i]))
+            sm.put(_FRAME_US)
+            sm.exec("pull()")
+            sm.exec("mov(isr, osr)")
+            self.sms.append(sm)
+            mask |= 1 << (sm_id - 4 + i)
+        # Enable all state machines in the same clock cycle
+        mem32[_PIO1_CTRL] |= mask | (mask << 8)
+        self.degrees = [0] * len(pins)
+
+    def setDegree(self, index, degree):
+        assert 0 <= degree <= 180, "ERROR - The degree parameter must be in the range 0--180"
+        self.degrees[index] = degree
+        self.sms[index].put(_PULSE_LUT[degree])
+
+    def setDegrees(self, degrees):
+        for degree in degrees:
+            assert 0 <= degree <= 180, "ERROR - The degree parameter must be in the range 0--180"
+        # Wait for FIFO room first, so put() cannot block with interrupts disabled.
+        for sm in self.sms:
+            while sm.tx_fifo() > 3: time.sleep_ms(1)
+        state = disable_irq()
+        for i in range(len(degrees)): self.sms[i].put(_PULSE_LUT[degrees[i]])
+        enable_irq(state)
+        for i in range(len(degrees)): self.degrees[i] = degrees[i]
+
+    def readDegree(self, index):
+        return self.degrees[index]
+
+
 if __name__ == '__main__':
+    # True: drive door, left and right together from PIO1 with MultiServo
+    pio_demo = False
+
+    if pio_demo:
+        servos = MultiServo([15, 13, 14])      # door, left, right
+        while True:
+            servos.setDegrees((90, 0, 180))
+            time.sleep(2)
+            servos.setDegrees((0, 90, 90))
+            time.sleep(2)
+            servos.setDegrees((90, 180, 0))
+            time.sleep(2)
+
     servo_door = Servo(15)
     servo_left = Servo(13)
     servo_right = Servo(14)
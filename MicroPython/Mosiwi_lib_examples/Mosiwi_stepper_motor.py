@@ -6,26 +6,23 @@ https://docs.micropython.org/en/latest/rp2/quickref.html
 Module containing code to run a stepper motor via the ULN2003 driver board.
 """
 import time, utime
+import array
+import micropython
+import uasyncio as asyncio
 from machine import Pin
 from machine import Timer
 
-__HALF_STEP_TABLE = [
-    [0, 0, 0, 1],
-    [0, 0, 1, 1],
-    [0, 0, 1, 0],
-    [0, 1, 1, 0],
-    [0, 1, 0, 0],
-    [1, 1, 0, 0],
-    [1, 0, 0, 0],
-    [1, 0, 0, 1],
-]
-
-__FULL_STEP_TABLE = [
- [1, 0, 1, 0],
- [0, 1, 1, 0],
- [0, 1, 0, 1],
- [1, 0, 0, 1]
-]
+@micropython.viper
+def _write_pins(set_mask: int, clr_mask: int):
+    """ Set and clear GPIO outputs in one go through the RP2040 SIO registers. """
+    sio = ptr32(0xd0000000)
+    sio[5] = set_mask       # GPIO_OUT_SET, offset 0x014
+    sio[6] = clr_mask       # GPIO_OUT_CLR, offset 0x018
+
+# Coil states of each step, packed one step per byte: bit i drives pins[i].
+__HALF_STEP_TABLE = b"\x08\x0c\x04\x06\x02\x03\x01\x09"
+
+__FULL_STEP_TABLE = b"\x05\x06\x0a\x09"
 
 class ULN2003(object):
     """
@@ -58,6 +55,23 @@ class ULN2003(object):
         # Set the correct step table.
         self.step_table = __HALF_STEP_TABLE if half_step else __FULL_STEP_TABLE
 
+        # Precompute the GPIO set/clear masks of every step, so _step() writes all pins at once.
+        self._all_mask = 0
+        for p in pins: self._all_mask |= 1 << p
+        self._set_masks = array.array('I')
+        self._clr_masks = array.array('I')
+        for state in self.step_table:
+            mask = 0
+            for i in range(4):
+                if state >> i & 1: mask |= 1 << pins[i]
+            self._set_masks.append(mask)
+            self._clr_masks.append(self._all_mask ^ mask)
+        # Both tables have a power-of-two length, so the index wraps with a mask.
+        self._imask = len(self.step_table) - 1
+
+        # Set by the timer interrupt when a move has finished, see wait().
+        self._done = asyncio.ThreadSafeFlag()
+
         # Set how many steps in a rotation.
         # The step Angle is 5.625° and the reduction ratio is 1/64
         # 4096 = 360/5.625 * 64
@@ -67,23 +81,22 @@ class ULN2003(object):
         Timer(freq=800, mode=Timer.PERIODIC, callback=self._step)
     
     # Interrupt function of timer
+    @micropython.native
     def _step(self, t):
-        if self.steps_sum > 0:
-            self.index = self.index + 1  if self.direction == 1 else self.index - 1
-            if self.direction == -1 and self.index < 0: self.index = len(self.step_table) - 1
-            if self.direction == 1 and self.index > len(self.step_table) - 1: self.index = 0
-            state = self.step_table[self.index]
-            for p in range(4):
-                self.pins[p].value(state[p])
-            self.steps_sum -= 1
+        n = self.steps_sum
+        if n > 0:
+            i = (self.index + self.direction) & self._imask
+            self.index = i
+            _write_pins(self._set_masks[i], self._clr_masks[i])
+            self.steps_sum = n - 1
+            if n <= 1: self._done.set()
             #print(self.index)
         else: self.__reset()
 
 
     def __reset(self):
         """ Set all output pins to 0. """
-        for pin in self.pins:
-            pin.value(0)
+        _write_pins(0, self._all_mask)
 
     def move(self, steps: int=0, direction: int=1):
         """
@@ -93,8 +106,12 @@ class ULN2003(object):
         - direction : int (Default: 1)
           The direction to move. Must be either: 1 for forward, or -1 for backwards.
         """
+        self.direction = 1 if direction == 1 else -1
         self.steps_sum = steps
-        self.direction = direction
+        # Clear only after the new move is in place, so a tick of the old
+        # move finishing in between cannot leave the flag set for this one.
+        self._done.clear()
+        if steps <= 0: self._done.set()
 
     def degree(self, degree: int=0, direction: int=1):
         """
@@ -103,21 +120,39 @@ class ULN2003(object):
         - direction : int (Default: 1)
           The direction to move. Must be either: 1 for forward, or -1 for backwards.
         """
-        self.move(self.steps_pr_rotation/360*degree, direction)
+        # Integer steps, so steps_sum stays an int for the compare in _step().
+        self.move(self.steps_pr_rotation * int(degree) // 360, direction)
+
+    async def wait(self):
+        """
+        Wait until the current move has finished. The task sleeps until the
+        timer interrupt signals the last step, rather than polling steps_sum.
+        """
+        await self._done.wait()
+
+    def wait_blocking(self):
+        """
+        Block until the current move has finished, for code without asyncio.
+        Sleeps between checks so the timer interrupt is not competing with a busy loop.
+        """
+        while self.steps_sum > 0: utime.sleep_ms(1)
 
 
 if __name__ == '__main__':
     stepper = ULN2003([6,7,8,9])
     '''
     stepper.move(4096, 1)
-    while stepper.steps_sum > 0: pass
+    stepper.wait_blocking()
     stepper.move(4096, -1)
-    while stepper.steps_sum > 0: pass
+    stepper.wait_blocking()
     '''
 
-    while True:
-        stepper.degree(360, 1)
-        while stepper.steps_sum > 0: pass
-        stepper.degree(360, -1)
-        while stepper.steps_sum > 0: pass
+    async def demo():
+        while True:
+            stepper.degree(360, 1)
+            await stepper.wait()
+            stepper.degree(360, -1)
+            await stepper.wait()
+
+    asyncio.run(demo())
 
@@ -0,0 +1,12 @@
+# https://docs.micropython.org/en/latest/rp2/quickref.html
+import time
+from machine import Pin
+
+def blink(pin, period=1.0):
+    p = Pin(pin, Pin.OUT)   # create output pin
+    while True:
+        p.toggle()          # flip the pin level
+        time.sleep(period)  # sleep for period seconds
+
+if __name__ == '__main__':
+    blink(12)
@@ -33,6 +33,9 @@ key_left = 0xff10ef       # ◀
 key_right = 0xff5aa5      # ▶
 key_ok = 0xff38c7         # OK
 
+# Toggle keys, ignored when repeated within 200ms
+DEBOUNCE_KEYS = frozenset((key_ok, key_0, key_1, key_2, key_3, key_5, key_8))
+
 laserSW = False
 laser = Pin(10, Pin.OUT)
 
@@ -51,15 +54,20 @@ servo_door.setDegree(0)
 
 servoAngle = 90
 servo_left = Servo(13)
-servo_left.setDegree(90)
 servo_right = Servo(14)
-servo_right.setDegree(90)
+
+# The two solar panel servos are mounted mirrored.
+def set_solar(angle):
+    servo_left.setDegree(angle)
+    servo_right.setDegree(180 - angle)
+
+set_solar(servoAngle)
 
 display = HT16K33Matrix(I2C(0, scl=Pin(5), sda=Pin(4)))
 display.set_brightness(1)
-display.scroll_text("Remote mode        ", 0.05)
+display.scroll_text("Remote mode        ", 50)
 
-ir = necDecoder(2, True)
+ir = necDecoder(2, True, autoDecode=True)
 
 ph = Ph_iic(5, 4)
 
@@ -72,53 +80,84 @@ modeFlag = 0
 warningFlag = True
 start_time = 0
 stop_time = 0
+AUTO_PERIOD_MS = 20     # Auto() runs at most once per period
+next_auto = 0
+
+# Last values written by Auto(), so unchanged outputs are not rewritten.
+_last_solar = _last_motor = _last_led = None
+
+# Remote control key handlers, dispatched by Remote().
+def _handle_left():                     # ◀, The space station turned left.
+    global motorAngle
+    if stepper.steps_sum <= 0: motorAngle += 1
+    stepper.degree(motorAngle, -1)
+
+def _handle_right():                    # ▶, The space station turned right.
+    global motorAngle
+    if stepper.steps_sum <= 0: motorAngle += 1
+    stepper.degree(motorAngle, 1)
+
+def _handle_up():                       # ▲, The solar panels turn backwards.
+    global servoAngle
+    if servoAngle < 180: servoAngle += 1
+    set_solar(servoAngle)
+
+def _handle_down():                     # ▼, The solar panels turn forward.
+    global servoAngle
+    if servoAngle > 0: servoAngle -= 1
+    set_solar(servoAngle)
+
+def _handle_ph():                       # 0, photosensitive
+    ph.refresh()
+    ph_ = ph.readPh(8)
+    display.scroll_text("Ph: " + str(ph_) + "        ", 50)
+
+def _handle_led():                      # 1, LED switch
+    global ledSW
+    ledSW = not ledSW
+    if ledSW: led.on()
+    else: led.off()
 
-def Remote():
-    global motorAngle, servoAngle, ledSW, buzzerSW, laserSW, doorSW
-    global key_left, key_right, key_up, key_down, key_0, key_1, key_2, key_3, key_5, key_8
-    if ir.necData == key_left:          # ◀, The space station turned left.
-        if stepper.steps_sum <= 0: motorAngle += 1
-        stepper.degree(motorAngle, -1)
-    elif ir.necData == key_right:       # ▶, The space station turned right.
-        if stepper.steps_sum <= 0: motorAngle += 1
-        stepper.degree(motorAngle, 1)
-    elif ir.necData == key_up:          # ▲, The solar panels turn backwards.
-        if servoAngle < 180: servoAngle += 1
-        servo_left.setDegree(servoAngle)
-        servo_right.setDegree(180 - servoAngle)
-    elif ir.necData == key_down:        # ▼, The solar panels turn forward.
-        if servoAngle > 0: servoAngle -= 1
-        servo_left.setDegree(servoAngle)
-        servo_right.setDegree(180 - servoAngle)
-    elif ir.necData == key_0:           # 0, photosensitive
-        ph_ = ph.readPh(8)
-        display.scroll_text("Ph: " + str(ph_) + "        ", 0.05)
-    elif ir.necData == key_1:           # 1, LED switch
-        ledSW = not ledSW
-        if ledSW: led.on()
-        else: led.off()
-    elif ir.necData == key_2:           # 2, Buzzer switch
-        buzzerSW = not buzzerSW
-        if buzzerSW: buzzer.setVolume(100)
-        else: buzzer.setVolume(0)
-    elif ir.necData == key_3:           # 3, Laser switch
-        laserSW = not laserSW
-        if laserSW: laser.on()
-        else: laser.off()
-    elif ir.necData == key_5:           # 5, door switch
-        doorSW = not doorSW
-        if doorSW: servo_door.setDegree(90)
-        else: servo_door.setDegree(0)
-    elif ir.necData == key_8:           # 8, Detects the battery voltage percentage.
-        percent = bat.percentageVoltage()
-        display.scroll_text("BAT: " + str(percent) + " %        ", 0.05)
+def _handle_buzzer():                   # 2, Buzzer switch
+    global buzzerSW
+    buzzerSW = not buzzerSW
+    if buzzerSW: buzzer.setVolume(100)
+    else: buzzer.setVolume(0)
+
+def _handle_laser():                    # 3, Laser switch
+    global laserSW
+    laserSW = not laserSW
+    if laserSW: laser.on()
+    else: laser.off()
+
+def _handle_door():                     # 5, door switch
+    global doorSW
+    doorSW = not doorSW
+    if doorSW: servo_door.setDegree(90)
+    else: servo_door.setDegree(0)
+
+def _handle_battery():                  # 8, Detects the battery voltage percentage.
+    percent = bat.percentageVoltage()
+    display.scroll_text("BAT: " + str(percent) + " %        ", 50)
+
+_HANDLERS = {
+    key_left: _handle_left, key_right: _handle_right,
+    key_up: _handle_up, key_down: _handle_down,
+    key_0: _handle_ph, key_1: _handle_led, key_2: _handle_buzzer,
+    key_3: _handle_laser, key_5: _handle_door, key_8: _handle_battery,
+}
+
+def Remote(code):
+    h = _HANDLERS.get(code)
+    if h is not None: h()
 
 # Automatically follow the light.
 def Auto():
     global warningFlag, start_time
-    percent = bat.percentageVoltage()
+    global _last_solar, _last_motor, _last_led
+    percent = bat.percentageFast()
     if percent < 10 and warningFlag:
-        display.scroll_text("BAT: " + str(percent) + " %        ", 0.05)
+        display.scroll_text("BAT: " + str(percent) + " %        ", 50)
         buzzer.setVolume(100)
         time.sleep(5)
         buzzer.setVolume(0)
@@ -126,45 +165,65 @@ def Auto():
         start_time = time.ticks_ms()  # get millisecond counter
     if percent > 10: warningFlag = True
 
+    ph.refresh()    # one I2C read for both the light direction and level
     degree = ph.readDegree()
     if degree > 360:
-        servo_left.setDegree(90)
-        servo_right.setDegree(90)
+        solar = 90
     else:      
-        if degree < 180: stepper.degree(degree, 1)
-        else: stepper.degree(360 - degree, -1)
-        servo_left.setDegree(45)
-        servo_right.setDegree(135)  
-    
-    if ph.readPh(8) < 50: led.on()
-    else: led.off()
+        if degree < 180: motor = (degree, 1)
+        else: motor = (360 - degree, -1)
+        # Only restart the stepper for a new target or once the last move is done.
+        if motor != _last_motor or stepper.steps_sum <= 0:
+            stepper.degree(motor[0], motor[1])
+            _last_motor = motor
+        solar = 45
+    if solar != _last_solar:
+        set_solar(solar)
+        _last_solar = solar
+
+    ledOn = ph.readPh(8) < 50
+    if ledOn != _last_led:
+        if ledOn: led.on()
+        else: led.off()
+        _last_led = ledOn
     
 
+# Bound once so the main loop skips the time module attribute lookups.
+_ticks_ms = time.ticks_ms
+_ticks_diff = time.ticks_diff
+_ticks_add = time.ticks_add
+_sleep_ms = time.sleep_ms
+
 while True:
-    stop_time = time.ticks_ms() # get millisecond counter
-    if ir.decode():
-        if (time.ticks_diff(stop_time, start_time) < 200) and (\
-        ir.necData == key_ok or ir.necData == key_0 or ir.necData == key_1 or\
-        ir.necData == key_2  or ir.necData == key_3 or ir.necData == key_5 or\
-        ir.necData == key_8):
-            ir.necData =0
+    stop_time = _ticks_ms() # get millisecond counter
+    if ir.ready:
+        ir.ready = False
+        code = ir.necData   # one snapshot, the IR decoder may rewrite necData at any time
+        if _ticks_diff(stop_time, start_time) < 200 and code in DEBOUNCE_KEYS:
+            code = 0
         
-        if ir.necData == key_ok:      # OK, mode selection
+        if code == key_ok:      # OK, mode selection
             mode = 1 - mode
         if mode == 0:
             if modeFlag == 1:
-                display.scroll_text("Remote        ", 0.05)
+                display.scroll_text("Remote        ", 50)
                 modeFlag = 0
-            Remote() 
-        start_time = time.ticks_ms()  # get millisecond counter
+            Remote(code)
+        start_time = _ticks_ms()  # get millisecond counter
             
     if mode == 1:  
         if modeFlag == 0:
-            display.scroll_text("Auto        ", 0.05)
-            start_time = time.ticks_ms()  # get millisecond counter
+            display.scroll_text("Auto        ", 50)
+            start_time = _ticks_ms()  # get millisecond counter
             modeFlag = 1
-        Auto()
-    #time.sleep(0.01)
+            # Remote mode may have moved the outputs, forget what Auto() last wrote.
+            _last_solar = _last_motor = _last_led = None
+            next_auto = start_time
+        now = _ticks_ms()
+        if _ticks_diff(now, next_auto) >= 0:
+            Auto()
+            next_auto = _ticks_add(now, AUTO_PERIOD_MS)
+    _sleep_ms(2)    # yield to the IR and stepper interrupts
     
     
     